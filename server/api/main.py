@@ -1,3 +1,7 @@
+import time
+
+_IMPORT_START = time.perf_counter()
+
 import os
 import shutil
 import tempfile
@@ -10,8 +14,15 @@ from fastapi.middleware.cors import CORSMiddleware
 from slowapi import Limiter, _rate_limit_exceeded_handler
 from slowapi.util import get_remote_address
 
-from server.database.handler import DatabaseHandler
+from server.database.backend import batches_queries, get_database_handler
+from server.database.batcher import MatchBatcher
 from server.engine.handler import match_from_file
+from server.engine.warmup import warm_up
+
+IMPORT_SECONDS = round(time.perf_counter() - _IMPORT_START, 4)
+
+# Set WARMUP_ON_STARTUP=0 to skip priming the match pipeline at startup
+WARMUP_ON_STARTUP = os.getenv("WARMUP_ON_STARTUP", "1") != "0"
 
 app = FastAPI()
 
@@ -36,9 +47,31 @@ TASKS = {}
 # Thread pool for background processing
 POOL = ThreadPoolExecutor(max_workers=4)
 
+# Coalesces concurrent match queries into one DB round-trip.
+# Backends without a batched query are called directly so matches run in parallel.
+BATCHER = MatchBatcher() if batches_queries() else None
+
+# Startup-time report, served on /metrics
+STARTUP = {"imports": IMPORT_SECONDS}
+
+
+@app.on_event("startup")
+def startup():
+    if WARMUP_ON_STARTUP:
+        STARTUP["warmup"] = warm_up(matcher=BATCHER)
+    print(f"[API] Startup report: {STARTUP}")
+
+
+@app.on_event("shutdown")
+def shutdown():
+    POOL.shutdown(wait=True)
+    if BATCHER is not None:
+        BATCHER.close()
+
+
 def process_audio(task_id: str, file_path: str):
     try:
-        result = match_from_file(file_path, logging_enabled=False)
+        result = match_from_file(file_path, logging_enabled=False, matcher=BATCHER)
         TASKS[task_id]["status"] = "success"
         TASKS[task_id]["result"] = result
     except Exception as e:
@@ -82,6 +115,14 @@ def home(request: Request):
         "msg": "spectra-api"
     }
 
+@app.get("/metrics")
+@limiter.limit("30/minute")
+def metrics(request: Request):
+    return {
+        "startup": STARTUP,
+        "matcher": BATCHER.metrics() if BATCHER is not None else None
+    }
+
 @app.get("/health")
 @limiter.limit("5/minute")
 def health(request: Request):
@@ -90,6 +131,10 @@ def health(request: Request):
     # ThreadPool status
     checks["thread_pool"] = not POOL._shutdown
 
+    # Match batcher worker status
+    if BATCHER is not None:
+        checks["matcher"] = BATCHER.stopped is None
+
     # Filesystem write test
     try:
         with tempfile.NamedTemporaryFile(delete=True) as f:
@@ -99,7 +144,7 @@ def health(request: Request):
         checks["filesystem"] = False
 
     # Database check
-    with DatabaseHandler() as db:
+    with get_database_handler() as db:
         checks["database"] = db.health_check()
 
     status = "ok" if all(checks.values()) else "degraded"
@@ -0,0 +1,133 @@
+import os
+from abc import ABC, abstractmethod
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Storage backend selection, "postgres" (default) or "sqlite"
+DB_BACKEND = os.getenv("DB_BACKEND", "postgres").lower()
+
+
+class StorageBackend(ABC):
+    """
+    Storage interface used by the engine and API.
+    Implementations connect lazily and can be used as context managers.
+    """
+
+    @abstractmethod
+    def _connect(self):
+        ...
+
+    @abstractmethod
+    def close(self):
+        ...
+
+    def __enter__(self):
+        self._connect()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    @abstractmethod
+    def health_check(self) -> bool:
+        ...
+
+    @abstractmethod
+    def insert_song_metadata(self, metadata: dict, fingerprinted=False, max_retries=3):
+        """
+        Insert a song, returns song_id (existing or newly created).
+        """
+
+    @abstractmethod
+    def bulk_insert_fingerprints(self, hashes, song_id, chunk_size=10_000, max_retries=3):
+        """
+        Insert fingerprints for a song and mark it as fingerprinted.
+        hashes = [(hash, time_offset), ...]
+        """
+
+    @abstractmethod
+    def find_block_votes(self, hashes, block_frames, top_n=20, chunk_size=50_000):
+        """
+        Count time-aligned votes per block of query time, in the DB.
+        hashes = [(hash, time_offset), ...]
+        Returns list of (block, song_id, db_offset - query_offset, votes),
+        keeping the top_n entries per block.
+        """
+
+    @abstractmethod
+    def find_song_from_hashes(self, hashes, limit=3, min_votes=20, min_confidence=0.15):
+        """
+        Returns list of match dicts ordered by votes, or empty list.
+        """
+
+    def find_songs_from_hash_batches(self, queries, limit=3, min_votes=20, min_confidence=0.15):
+        """
+        Match several independent queries at once.
+        queries = [[(hash, time_offset), ...], ...]
+        Returns one match list per query, in the same order.
+        Backends with a network round-trip should override this with a single query.
+        """
+        return [
+            self.find_song_from_hashes(
+                hashes,
+                limit=limit,
+                min_votes=min_votes,
+                min_confidence=min_confidence,
+            )
+            for hashes in queries
+        ]
+
+
+def split_block_chunks(hashes, block_frames, chunk_size):
+    """
+    Tag hashes with their block (time_offset // block_frames) and split them
+    into chunks of about chunk_size, cut only at block boundaries so every
+    block is voted on in a single query.
+    Yields lists of (hash, block, time_offset).
+    """
+
+    chunk = []
+    for h, t in sorted(hashes, key=lambda x: x[1]):
+        block = int(t) // block_frames
+        if len(chunk) >= chunk_size and chunk[-1][1] != block:
+            yield chunk
+            chunk = []
+        chunk.append((bytes(h), block, int(t)))
+
+    if chunk:
+        yield chunk
+
+
+def get_backend_class():
+    """
+    Storage backend class selected by DB_BACKEND.
+    Backend modules are imported here so only the selected driver is loaded.
+    """
+
+    if DB_BACKEND == "postgres":
+        from server.database.handler import DatabaseHandler
+        return DatabaseHandler
+
+    if DB_BACKEND == "sqlite":
+        from server.database.sqlite_handler import SQLiteHandler
+        return SQLiteHandler
+
+    raise RuntimeError(f"Unknown DB_BACKEND '{DB_BACKEND}'")
+
+
+def get_database_handler() -> StorageBackend:
+    """
+    Create the storage backend selected by DB_BACKEND.
+    """
+    return get_backend_class()()
+
+
+def batches_queries() -> bool:
+    """
+    True if the selected backend matches a whole batch in one query,
+    i.e. overrides the one-query-per-entry fallback.
+    """
+    backend = get_backend_class()
+    return backend.find_songs_from_hash_batches is not StorageBackend.find_songs_from_hash_batches
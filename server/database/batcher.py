@@ -0,0 +1,224 @@
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+
+from dotenv import load_dotenv
+
+from server.database.backend import get_database_handler
+
+load_dotenv()
+
+# How long the first query of a batch waits for others to join (ms)
+MATCH_BATCH_WINDOW_MS = float(os.getenv("MATCH_BATCH_WINDOW_MS", "15"))
+# Max queries sent to the DB in one round-trip
+MATCH_BATCH_MAX_SIZE = int(os.getenv("MATCH_BATCH_MAX_SIZE", "16"))
+# Max seconds a caller waits for its batch to be matched
+MATCH_TIMEOUT = float(os.getenv("MATCH_TIMEOUT", "30"))
+
+_STOP = object()
+
+
+class MatchBatcher:
+    """
+    Coalesce concurrent find_song_from_hashes calls into one DB round-trip.
+    Callers block until their batch is matched, so it can be passed
+    anywhere a storage backend is used for matching.
+    """
+
+    def __init__(
+        self,
+        window_ms=MATCH_BATCH_WINDOW_MS,
+        max_batch_size=MATCH_BATCH_MAX_SIZE,
+        handler_factory=get_database_handler,
+    ):
+        self._window = window_ms / 1000
+        self._max_batch_size = max(1, max_batch_size)
+        self._handler_factory = handler_factory
+
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        # Set once the worker has exited, new queries are rejected after that
+        self._stopped = None
+        # Set once the worker's DB connection has been opened (or failed)
+        self._ready = threading.Event()
+        self._db_ok = False
+        self._stats = {
+            "queries": 0,
+            "batches": 0,
+            "errors": 0,
+            "retries": 0,
+            "max_batch_size": 0,
+            "wait_ms": 0.0,
+            "db_ms": 0.0,
+        }
+
+        self._thread = threading.Thread(target=self._run, name="match-batcher", daemon=True)
+        self._thread.start()
+
+    def find_song_from_hashes(self, hashes, timeout=MATCH_TIMEOUT):
+        """
+        Queue a query and wait (at most timeout seconds) for its batch to be matched.
+        Returns list of matches or empty list.
+        """
+
+        future = Future()
+
+        # Checked under the lock so nothing is queued after the worker drains the queue
+        with self._lock:
+            if self._stopped:
+                raise RuntimeError(self._stopped)
+            self._queue.put((hashes, future, time.perf_counter()))
+
+        try:
+            return future.result(timeout)
+        except FutureTimeoutError:
+            raise RuntimeError(f"Match timed out after {timeout}s")
+
+    @property
+    def stopped(self):
+        """
+        Reason the worker stopped, or None while it is running.
+        """
+        with self._lock:
+            return self._stopped
+
+    def wait_ready(self, timeout=MATCH_TIMEOUT) -> bool:
+        """
+        Wait for the worker to open its DB connection.
+        Returns True if the connection is healthy.
+        """
+        self._ready.wait(timeout)
+        return self._db_ok
+
+    def metrics(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+
+        batches = stats["batches"] or 1
+        queries = stats["queries"] or 1
+
+        return {
+            "window_ms": self._window * 1000,
+            "max_batch_size": self._max_batch_size,
+            "queries": stats["queries"],
+            "batches": stats["batches"],
+            "errors": stats["errors"],
+            "retries": stats["retries"],
+            "largest_batch": stats["max_batch_size"],
+            "avg_batch_size": stats["queries"] / batches,
+            "avg_wait_ms": stats["wait_ms"] / queries,
+            "avg_db_ms": stats["db_ms"] / batches,
+        }
+
+    def close(self):
+        self._queue.put(_STOP)
+        self._thread.join()
+
+    def _collect(self, first):
+        """
+        Gather queries arriving within the window after the first one.
+        Returns (batch, stop requested).
+        """
+
+        batch = [first]
+        deadline = time.perf_counter() + self._window
+
+        while len(batch) < self._max_batch_size:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+
+            if item is _STOP:
+                return batch, True
+            batch.append(item)
+
+        return batch, False
+
+    def _run(self):
+        db = None
+        reason = "Match batcher is closed"
+
+        try:
+            # Created on the worker thread, which owns its connection
+            db = self._handler_factory()
+            # Open the connection up front so the first batch does not pay for it
+            self._db_ok = db.health_check()
+            self._ready.set()
+
+            stop = False
+            while not stop:
+                first = self._queue.get()
+                if first is _STOP:
+                    break
+
+                batch, stop = self._collect(first)
+                self._dispatch(db, batch)
+
+        except Exception as e:
+            reason = f"Match batcher stopped: {e}"
+            print(f"[Batcher] {reason}")
+
+        finally:
+            with self._lock:
+                self._stopped = reason
+            self._ready.set()
+            if db is not None:
+                db.close()
+            self._fail_pending(RuntimeError(reason))
+
+    def _fail_pending(self, error):
+        """
+        Fail every query still queued once the worker has exited.
+        """
+
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                return
+
+            if item is not _STOP:
+                item[1].set_exception(error)
+
+    def _dispatch(self, db, batch):
+        start = time.perf_counter()
+        queries = [hashes for hashes, _, _ in batch]
+
+        try:
+            try:
+                results = db.find_songs_from_hash_batches(queries)
+            except Exception as e:
+                # Connection may have been dropped (server restart, pooler idle cut),
+                # retry once on a fresh one
+                print(f"[Batcher] Batch failed, retrying on a new connection: {e}")
+                db.close()
+                with self._lock:
+                    self._stats["retries"] += 1
+                results = db.find_songs_from_hash_batches(queries)
+
+        except Exception as e:
+            db.close()
+            with self._lock:
+                self._stats["errors"] += 1
+            for _, future, _ in batch:
+                future.set_exception(e)
+            return
+
+        db_ms = (time.perf_counter() - start) * 1000
+
+        with self._lock:
+            self._stats["queries"] += len(batch)
+            self._stats["batches"] += 1
+            self._stats["max_batch_size"] = max(self._stats["max_batch_size"], len(batch))
+            self._stats["wait_ms"] += sum((start - queued) * 1000 for _, _, queued in batch)
+            self._stats["db_ms"] += db_ms
+
+        for (_, future, _), result in zip(batch, results):
+            future.set_result(result)
@@ -2,10 +2,16 @@ import os
 import psycopg
 from dotenv import load_dotenv
 
+from server.database.backend import StorageBackend, split_block_chunks
+
 load_dotenv()
 
 
-class DatabaseHandler:
+class DatabaseHandler(StorageBackend):
+    """
+    PostgreSQL storage backend.
+    """
+
     def __init__(self):
         self._db_url = os.getenv("DB_URL")
         if not self._db_url:
@@ -30,12 +36,26 @@ class DatabaseHandler:
         self._connect()
         return self._connection.cursor()
 
-    def __enter__(self):
-        self._connect()
-        return self
-
-    def __exit__(self, exc_type, exc_val, exc_tb):
-        self.close()
+    def _fetch_all(self, query, params=None):
+        """
+        Run a read-only query and end its transaction, so a long-lived
+        connection is never left idle in transaction holding table locks.
+        """
+        try:
+            with self._cursor() as cur:
+                cur.execute(query, params)
+                return cur.fetchall()
+        finally:
+            self._end_transaction()
+
+    def _end_transaction(self):
+        if self._connection is None:
+            return
+        try:
+            self._connection.rollback()
+        except Exception:
+            # Connection is broken, drop it so the next call reconnects
+            self.close()
 
     def close(self):
         if self._connection:
@@ -46,10 +66,7 @@ class DatabaseHandler:
 
     def health_check(self) -> bool:
         try:
-            self._connect()
-            with self._connection.cursor() as cur:
-                cur.execute("SELECT 1;")
-                cur.fetchone()
+            self._fetch_all("SELECT 1;")
             return True
         except Exception:
             return False
@@ -160,6 +177,58 @@ class DatabaseHandler:
             self._connection.rollback()
             print(f"[DB] Failed to mark song {song_id} as fingerprinted: {e}")
 
+    def find_block_votes(self, hashes, block_frames, top_n=20, chunk_size=50_000):
+        """
+        Count time-aligned votes per block of query time.
+        Grouping by (block, song, offset difference) happens in the DB,
+        so only the top_n counts per block are sent back.
+        hashes = [(hash, time_offset), ...]
+        Returns list of (block, song_id, db_offset - query_offset, votes).
+        """
+
+        query = """
+            WITH query_hashes(hash, block, query_offset) AS (
+                SELECT * FROM unnest(%s::bytea[], %s::int[], %s::int[])
+            ),
+            block_votes AS (
+                SELECT
+                    q.block,
+                    f.song_id,
+                    f.time_offset - q.query_offset AS delta,
+                    COUNT(*) AS votes
+                FROM fingerprints f
+                JOIN query_hashes q ON f.hash = q.hash
+                GROUP BY q.block, f.song_id, f.time_offset - q.query_offset
+            ),
+            ranked AS (
+                SELECT
+                    block,
+                    song_id,
+                    delta,
+                    votes,
+                    ROW_NUMBER() OVER (
+                        PARTITION BY block ORDER BY votes DESC
+                    ) AS vote_rank
+                FROM block_votes
+            )
+            SELECT block, song_id, delta, votes
+            FROM ranked
+            WHERE vote_rank <= %s;
+        """
+
+        votes = []
+        for chunk in split_block_chunks(hashes, block_frames, chunk_size):
+            params = [
+                [h for h, _, _ in chunk],
+                [block for _, block, _ in chunk],
+                [t for _, _, t in chunk],
+                top_n,
+            ]
+
+            votes.extend(self._fetch_all(query, params))
+
+        return votes
+
     def find_song_from_hashes(
         self,
         hashes,
@@ -214,9 +283,7 @@ class DatabaseHandler:
             limit,
         ]
 
-        with self._cursor() as cur:
-            cur.execute(query, params)
-            rows = cur.fetchall()
+        rows = self._fetch_all(query, params)
 
         if not rows:
             return []
@@ -250,3 +317,119 @@ class DatabaseHandler:
             )
 
         return results
+
+    def find_songs_from_hash_batches(
+        self,
+        queries,
+        limit=3,
+        min_votes=20,
+        min_confidence=0.15,
+    ):
+        """
+        Match several queries in one round-trip.
+        Hashes are tagged with their query index, voted per (query, song)
+        and the top `limit` songs are kept per query.
+        queries = [[(hash, time_offset), ...], ...]
+        Returns one match list per query, in the same order.
+        """
+
+        results = [[] for _ in queries]
+
+        query_ids = []
+        hash_list = []
+        for query_id, hashes in enumerate(queries):
+            query_ids.extend([query_id] * len(hashes))
+            hash_list.extend(h for h, _ in hashes)
+
+        if not hash_list:
+            return results
+
+        total_ids = list(range(len(queries)))
+        total_list = [len(hashes) for hashes in queries]
+
+        query = """
+            WITH query_hashes(query_id, hash) AS (
+                SELECT * FROM unnest(%s::int[], %s::bytea[])
+            ),
+            query_totals(query_id, total) AS (
+                SELECT * FROM unnest(%s::int[], %s::int[])
+            ),
+            query_votes AS (
+                SELECT q.query_id, f.song_id, COUNT(*) AS votes
+                FROM fingerprints f
+                JOIN query_hashes q ON f.hash = q.hash
+                GROUP BY q.query_id, f.song_id
+            ),
+            ranked AS (
+                SELECT
+                    v.query_id,
+                    v.song_id,
+                    v.votes,
+                    v.votes::float / t.total AS confidence,
+                    ROW_NUMBER() OVER (
+                        PARTITION BY v.query_id ORDER BY v.votes DESC
+                    ) AS match_rank
+                FROM query_votes v
+                JOIN query_totals t ON t.query_id = v.query_id
+                WHERE v.votes >= %s
+                  AND v.votes::float / t.total >= %s
+            )
+            SELECT
+                r.query_id,
+                s.song_id,
+                s.song_name,
+                s.video_id,
+                s.title,
+                s.artist,
+                s.album,
+                s.album_art,
+                s.webpage_url,
+                r.votes,
+                r.confidence
+            FROM ranked r
+            JOIN songs s ON s.song_id = r.song_id
+            WHERE r.match_rank <= %s
+            ORDER BY r.query_id, r.votes DESC, r.confidence DESC;
+        """
+
+        params = [
+            query_ids,
+            hash_list,
+            total_ids,
+            total_list,
+            min_votes,
+            min_confidence,
+            limit,
+        ]
+
+        rows = self._fetch_all(query, params)
+
+        for (
+            query_id,
+            song_id,
+            song_name,
+            video_id,
+            title,
+            artist,
+            album,
+            album_art,
+            webpage_url,
+            votes,
+            confidence,
+        ) in rows:
+            results[query_id].append(
+                {
+                    "song_id": song_id,
+                    "song_name": song_name,
+                    "video_id": video_id,
+                    "title": title,
+                    "artist": artist,
+                    "album": album,
+                    "album_art": album_art,
+                    "webpage_url": webpage_url,
+                    "votes": votes,
+                    "confidence": confidence,
+                }
+            )
+
+        return results
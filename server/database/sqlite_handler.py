@@ -0,0 +1,305 @@
+import os
+import sqlite3
+from dotenv import load_dotenv
+
+from server.database.backend import StorageBackend, split_block_chunks
+
+load_dotenv()
+
+SCHEMA = """
+    CREATE TABLE IF NOT EXISTS songs (
+        song_id INTEGER PRIMARY KEY,
+        song_name TEXT UNIQUE NOT NULL,
+        video_id TEXT,
+        title TEXT,
+        artist TEXT,
+        album TEXT,
+        album_art TEXT,
+        webpage_url TEXT,
+        fingerprinted INTEGER NOT NULL DEFAULT 0
+    );
+
+    -- Duplicate rows are kept, as in Postgres, so vote counts match across backends.
+    CREATE TABLE IF NOT EXISTS fingerprints (
+        hash BLOB NOT NULL,
+        song_id INTEGER NOT NULL,
+        time_offset INTEGER NOT NULL
+    );
+
+    -- Covering index: hash lookups are a single b-tree range scan
+    -- that never touches the table itself.
+    CREATE INDEX IF NOT EXISTS fingerprints_hash_idx
+        ON fingerprints (hash, song_id, time_offset);
+"""
+
+MATCH_COLUMNS = (
+    "song_id",
+    "song_name",
+    "video_id",
+    "title",
+    "artist",
+    "album",
+    "album_art",
+    "webpage_url",
+    "votes",
+    "confidence",
+)
+
+
+class SQLiteHandler(StorageBackend):
+    """
+    Embedded SQLite storage backend for local, CI and offline deployments.
+    Uses WAL mode so matching can read while fingerprints are being loaded.
+    """
+
+    def __init__(self):
+        self._db_path = os.getenv("SQLITE_PATH", "spectra.db")
+        self._connection = None
+
+    def _connect(self):
+        """
+        Lazily open the DB file and create the schema on first use.
+        """
+        if self._connection is None:
+            self._connection = sqlite3.connect(self._db_path, timeout=30)
+            self._connection.executescript(
+                """
+                PRAGMA journal_mode = WAL;
+                PRAGMA synchronous = NORMAL;
+                PRAGMA temp_store = MEMORY;
+                PRAGMA cache_size = -65536;
+                PRAGMA mmap_size = 268435456;
+                """
+            )
+            self._connection.executescript(SCHEMA)
+
+    def _cursor(self):
+        self._connect()
+        return self._connection.cursor()
+
+    def close(self):
+        if self._connection:
+            try:
+                self._connection.close()
+            finally:
+                self._connection = None
+
+    def health_check(self) -> bool:
+        try:
+            cur = self._cursor()
+            cur.execute("SELECT 1;")
+            cur.fetchone()
+            return True
+        except Exception:
+            return False
+
+    def _load_query_hashes(self, cur, hashes):
+        """
+        Fill the per-connection temp table used to join query hashes.
+        """
+        cur.execute(
+            """
+            CREATE TEMP TABLE IF NOT EXISTS query_hashes (
+                hash BLOB NOT NULL,
+                query_offset INTEGER NOT NULL
+            )
+            """
+        )
+        cur.execute("DELETE FROM query_hashes")
+        cur.executemany(
+            "INSERT INTO query_hashes (hash, query_offset) VALUES (?, ?)",
+            [(bytes(h), int(t)) for h, t in hashes],
+        )
+
+    def insert_song_metadata(self, metadata: dict, fingerprinted=False, max_retries=3):
+        """
+        Insert a song into songs table.
+        Returns song_id (existing or newly created).
+        """
+
+        song_name = metadata.get("song_name") or metadata.get("title")
+
+        for attempt in range(max_retries):
+            try:
+                cur = self._cursor()
+                cur.execute(
+                    """
+                    INSERT OR IGNORE INTO songs
+                        (song_name, video_id, title, artist, album, album_art, webpage_url, fingerprinted)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                    """,
+                    (
+                        song_name,
+                        metadata.get("video_id"),
+                        metadata.get("title"),
+                        metadata.get("artist"),
+                        metadata.get("album"),
+                        metadata.get("album_art"),
+                        metadata.get("webpage_url"),
+                        int(fingerprinted),
+                    ),
+                )
+                cur.execute("SELECT song_id FROM songs WHERE song_name = ?", (song_name,))
+                row = cur.fetchone()
+                if not row:
+                    raise RuntimeError("Song exists but song_id not found")
+
+                self._connection.commit()
+                return row[0]
+
+            except Exception as e:
+                self._connection.rollback()
+                print(f"[DB] Attempt {attempt + 1}/{max_retries} failed inserting song: {e}")
+
+        raise RuntimeError(f"Failed to insert song '{song_name}' after retries")
+
+    def bulk_insert_fingerprints(self, hashes, song_id, chunk_size=100_000, max_retries=3):
+        """
+        Insert fingerprints in chunks, one transaction per chunk.
+        Rows are sorted by hash first so inserts walk the hash
+        index in order instead of splitting random pages.
+        hashes = [(hash, time_offset), ...]
+        """
+
+        rows = sorted((bytes(h), song_id, int(t)) for h, t in hashes)
+
+        for i in range(0, len(rows), chunk_size):
+            chunk = rows[i : i + chunk_size]
+
+            for attempt in range(max_retries):
+                try:
+                    cur = self._cursor()
+                    cur.executemany(
+                        """
+                        INSERT INTO fingerprints (hash, song_id, time_offset)
+                        VALUES (?, ?, ?)
+                        """,
+                        chunk,
+                    )
+                    self._connection.commit()
+                    break
+
+                except Exception as e:
+                    self._connection.rollback()
+                    print(
+                        f"[DB] Attempt {attempt + 1}/{max_retries} failed "
+                        f"for fingerprint chunk starting at {i}: {e}"
+                    )
+
+            else:
+                raise RuntimeError(f"Fingerprint chunk starting at {i} failed")
+
+        # Mark song as fingerprinted
+        try:
+            cur = self._cursor()
+            cur.execute("UPDATE songs SET fingerprinted = 1 WHERE song_id = ?", (song_id,))
+            self._connection.commit()
+        except Exception as e:
+            self._connection.rollback()
+            print(f"[DB] Failed to mark song {song_id} as fingerprinted: {e}")
+
+    def find_block_votes(self, hashes, block_frames, top_n=20, chunk_size=50_000):
+        """
+        Count time-aligned votes per block of query time in SQL.
+        hashes = [(hash, time_offset), ...]
+        Returns list of (block, song_id, db_offset - query_offset, votes).
+        """
+
+        votes = []
+        cur = self._cursor()
+        cur.execute(
+            """
+            CREATE TEMP TABLE IF NOT EXISTS block_hashes (
+                hash BLOB NOT NULL,
+                block INTEGER NOT NULL,
+                query_offset INTEGER NOT NULL
+            )
+            """
+        )
+
+        for chunk in split_block_chunks(hashes, block_frames, chunk_size):
+            cur.execute("DELETE FROM block_hashes")
+            cur.executemany(
+                "INSERT INTO block_hashes (hash, block, query_offset) VALUES (?, ?, ?)",
+                chunk,
+            )
+            cur.execute(
+                """
+                WITH block_votes AS (
+                    SELECT
+                        q.block,
+                        f.song_id,
+                        f.time_offset - q.query_offset AS delta,
+                        COUNT(*) AS votes
+                    FROM block_hashes q
+                    JOIN fingerprints f ON f.hash = q.hash
+                    GROUP BY q.block, f.song_id, delta
+                ),
+                ranked AS (
+                    SELECT
+                        block,
+                        song_id,
+                        delta,
+                        votes,
+                        ROW_NUMBER() OVER (
+                            PARTITION BY block ORDER BY votes DESC
+                        ) AS vote_rank
+                    FROM block_votes
+                )
+                SELECT block, song_id, delta, votes
+                FROM ranked
+                WHERE vote_rank <= ?
+                """,
+                (top_n,),
+            )
+            votes.extend(cur.fetchall())
+
+        self._connection.commit()
+        return votes
+
+    def find_song_from_hashes(
+        self,
+        hashes,
+        limit=3,
+        min_votes=20,
+        min_confidence=0.15,
+    ):
+        """
+        Match query fingerprints against DB.
+        Returns list of matches or empty list.
+        """
+
+        if not hashes:
+            return []
+
+        total_hashes = len(hashes)
+
+        cur = self._cursor()
+        self._load_query_hashes(cur, hashes)
+        cur.execute(
+            """
+            SELECT
+                s.song_id,
+                s.song_name,
+                s.video_id,
+                s.title,
+                s.artist,
+                s.album,
+                s.album_art,
+                s.webpage_url,
+                COUNT(*) AS votes,
+                CAST(COUNT(*) AS REAL) / ? AS confidence
+            FROM query_hashes q
+            JOIN fingerprints f ON f.hash = q.hash
+            JOIN songs s ON s.song_id = f.song_id
+            GROUP BY s.song_id
+            HAVING votes >= ? AND confidence >= ?
+            ORDER BY votes DESC, confidence DESC
+            LIMIT ?
+            """,
+            (total_hashes, min_votes, min_confidence, limit),
+        )
+        rows = cur.fetchall()
+        self._connection.commit()
+
+        return [dict(zip(MATCH_COLUMNS, row)) for row in rows]
@@ -1,8 +1,9 @@
 import sys
-import librosa
 import hashlib
 import numpy as np
-from scipy.ndimage import maximum_filter
+
+# librosa and scipy are imported inside the functions that use them:
+# they take seconds to import and are not needed by every command.
 
 # temporal window params for creating anchor-target pairs.
 FAN_OUT = 5             # No. of connections per peak 
@@ -12,6 +13,19 @@ MAX_TIME_DELTA = 40     # max time frame difference between an anchor and a targ
 # Neighborhood size for peak detection (frequency bins × time frames)
 neighborhood_size = (20, 10)
 
+# STFT params, also used to convert frame offsets to seconds
+SAMPLE_RATE = 22050
+N_FFT = 2048
+HOP_LENGTH = 512
+
+# Peak density control: a peak is dropped when its surrounding window already holds the target
+# number of stronger peaks, so every second of audio yields at most about the same number of peaks.
+# Changes the generated hashes, only enable it on a freshly fingerprinted DB.
+PEAKS_PER_SECOND = None     # target peaks per second of audio, None disables thinning
+DENSITY_WINDOW = 1.0        # seconds of audio (centred on each peak) the budget is applied over
+DENSITY_FREQ_BANDS = 4      # equal-width frequency bands used for the per-band minimum
+DENSITY_BAND_MIN = 2        # strongest peaks always kept per band and window, keeps peaks spread over the spectrum
+
 def sha1_hash(anchor_freq, target_freq, delta_t, reduction=20):
     s = f"{anchor_freq}|{target_freq}|{delta_t}"
     h = hashlib.sha1(s.encode("utf-8")).hexdigest()
@@ -21,12 +35,14 @@ def sha1_hash(anchor_freq, target_freq, delta_t, reduction=20):
 
 
 def load_file(filename):
+    import librosa
+
     print(f"Loading file: {filename}")
     
     # Load audio, resample to 22050 Hz, convert to mono
     y, sr = librosa.load(
         filename,  
-        sr=22050,
+        sr=SAMPLE_RATE,
         mono=True
     )
 
@@ -36,17 +52,17 @@ def load_file(filename):
     return y, sr
 
 def get_peak_points(y):
-    
+    import librosa
+    from scipy.ndimage import maximum_filter
+
     # STFT (Short-Time Fourier Transform): Converts the time-domain signal y into a 2D complex-valued array:
     # Rows → frequency bins, Columns → time frames
     # Represents frequency content over time.
 
-    n_fft = 2048
-    hop_length = 512
     stft_result = librosa.stft(
         y,
-        n_fft=n_fft,
-        hop_length=hop_length
+        n_fft=N_FFT,
+        hop_length=HOP_LENGTH
     )
 
     # Compute amplitude spectrogram
@@ -68,10 +84,24 @@ def get_peak_points(y):
 
     # Apply amplitude threshold
     amp_threshold = -40
-    peaks = np.where(local_max & (S_db > amp_threshold))
+    peak_freqs, peak_times = np.where(local_max & (S_db > amp_threshold))
+
+    # Cap peak density per second of audio
+    if PEAKS_PER_SECOND:
+        keep = thin_peaks(
+            peak_times,
+            peak_freqs,
+            S_db[peak_freqs, peak_times],
+            n_freq_bins=S_db.shape[0],
+            peaks_per_second=PEAKS_PER_SECOND,
+            window=DENSITY_WINDOW,
+            n_bands=DENSITY_FREQ_BANDS,
+            band_min=DENSITY_BAND_MIN,
+        )
+        peak_freqs, peak_times = peak_freqs[keep], peak_times[keep]
 
     # peak = (time frame, freq bin)
-    peak_points = list(zip(peaks[1], peaks[0]))
+    peak_points = list(zip(peak_times, peak_freqs))
 
     # sort by time
     peak_points.sort(key=lambda x: x[0])  
@@ -79,6 +109,65 @@ def get_peak_points(y):
     return peak_points
 
 
+def thin_peaks(
+    peak_times,
+    peak_freqs,
+    strengths,
+    n_freq_bins,
+    peaks_per_second,
+    window,
+    n_bands,
+    band_min,
+    chunk_size=4096,
+):
+    """
+    Keep a peak if fewer than peaks_per_second * window stronger peaks lie
+    within +-window/2 of it, or fewer than band_min stronger peaks of its own
+    frequency band do. The window is centred on each peak, so a query snippet
+    keeps the same peaks as the matching part of the full song.
+    Returns a boolean mask over the input peaks.
+    """
+
+    n_peaks = len(peak_times)
+    if n_peaks == 0:
+        return np.zeros(0, dtype=bool)
+
+    half_window = max(1, round(window * SAMPLE_RATE / HOP_LENGTH / 2))
+    budget = max(1, round(peaks_per_second * window))
+    band_size = -(-n_freq_bins // n_bands)
+
+    order = np.argsort(peak_times, kind="stable")
+    times = peak_times[order]
+    bands = peak_freqs[order] // band_size
+    strength = strengths[order]
+
+    # Neighbours of each peak are the contiguous range [lo, hi) of the time-sorted peaks
+    lo = np.searchsorted(times, times - half_window, side="left")
+    hi = np.searchsorted(times, times + half_window, side="right")
+    neighbours = np.arange(int((hi - lo).max()))
+
+    keep_sorted = np.empty(n_peaks, dtype=bool)
+
+    # Chunked so the (peaks x neighbours) matrix stays small on long recordings
+    for start in range(0, n_peaks, chunk_size):
+        rows = slice(start, min(start + chunk_size, n_peaks))
+
+        idx = lo[rows, None] + neighbours
+        valid = idx < hi[rows, None]
+        idx = np.minimum(idx, n_peaks - 1)
+
+        stronger = valid & (strength[idx] > strength[rows, None])
+        n_stronger = stronger.sum(axis=1)
+        n_stronger_band = (stronger & (bands[idx] == bands[rows, None])).sum(axis=1)
+
+        keep_sorted[rows] = (n_stronger < budget) | (n_stronger_band < band_min)
+
+    keep = np.empty(n_peaks, dtype=bool)
+    keep[order] = keep_sorted
+
+    return keep
+
+
 def generate_hashes(peak_points):
     hashes = []
 
@@ -5,7 +5,8 @@ import numpy as np
 
 from server.engine.fingerprint import load_file, get_peak_points, generate_hashes
 from server.engine.dl_handler import download_yt_music, get_music_metadata
-from server.database.handler import DatabaseHandler
+from server.engine.segments import build_timeline, hop_frames
+from server.database.backend import get_database_handler
 
 
 def insert_from_url(url, logging_enabled=True):
@@ -21,7 +22,7 @@ def insert_from_url(url, logging_enabled=True):
    
     metadata = get_music_metadata(url)
 
-    with DatabaseHandler() as db:
+    with get_database_handler() as db:
         for track in metadata:
             try:
                 if logging_enabled:
@@ -56,9 +57,11 @@ def insert_from_url(url, logging_enabled=True):
                     os.remove(track.get("audio_path"))
 
 
-def match_from_file(file_path, logging_enabled=True):
+def match_from_file(file_path, logging_enabled=True, matcher=None):
     """
     Load file, generate hashes, and compare to DB.
+    If a matcher (e.g. MatchBatcher) is given it is used instead of
+    opening a new DB connection.
     Only prints logs if logging_enabled=True.
     """
 
@@ -73,8 +76,11 @@ def match_from_file(file_path, logging_enabled=True):
     print(f"Generated {len(hashes)} hashes")
     
     sampled_hashes = random.sample(hashes, min(5000, len(hashes)))
-    with DatabaseHandler() as db:
-        result = db.find_song_from_hashes(sampled_hashes)
+    if matcher is not None:
+        result = matcher.find_song_from_hashes(sampled_hashes)
+    else:
+        with get_database_handler() as db:
+            result = db.find_song_from_hashes(sampled_hashes)
     
     if result:
         if logging_enabled:
@@ -96,3 +102,38 @@ def match_from_file(file_path, logging_enabled=True):
         if logging_enabled:
             print("No matches found.")
         return None
+
+
+def match_segments_from_file(file_path, logging_enabled=True):
+    """
+    Load a long recording (e.g. a mix), generate hashes once,
+    count aligned votes per block in a few batched DB queries and build a timeline
+    of the songs it contains.
+    Returns list of (start_sec, end_sec, song_id, confidence).
+    """
+
+    y, _ = load_file(filename=file_path)
+
+    if np.max(np.abs(y)) < 1e-3:
+        raise Exception("Recording is silent")
+
+    peak_points = get_peak_points(y=y)
+    hashes = generate_hashes(peak_points=peak_points)
+
+    if logging_enabled:
+        print(f"Generated {len(hashes)} hashes")
+
+    with get_database_handler() as db:
+        block_votes = db.find_block_votes(hashes, hop_frames())
+
+    timeline = build_timeline(hashes, block_votes)
+
+    if logging_enabled:
+        if timeline:
+            print("\nTimeline:")
+            for start, end, song_id, confidence in timeline:
+                print(f"{start:>6}s - {end:>6}s  song_id={song_id}  confidence={confidence:.3f}")
+        else:
+            print("No matches found.")
+
+    return timeline
@@ -0,0 +1,129 @@
+from collections import Counter
+
+from server.engine.fingerprint import SAMPLE_RATE, HOP_LENGTH
+
+# Sliding window params for segment matching (seconds)
+SEGMENT_WINDOW = 10     # length of each scored window
+SEGMENT_HOP = 5         # step between window starts, must divide SEGMENT_WINDOW
+
+# Per-window acceptance thresholds
+SEGMENT_MIN_VOTES = 15          # min aligned hash hits for a window to count as a match
+SEGMENT_MIN_CONFIDENCE = 0.05   # min aligned hits / query hashes in the window
+
+FRAMES_PER_SECOND = SAMPLE_RATE / HOP_LENGTH
+
+
+def hop_frames(hop=SEGMENT_HOP):
+    """
+    Block size in STFT frames for a window hop in seconds.
+    """
+    return max(1, round(hop * FRAMES_PER_SECOND))
+
+
+def _block_votes(hashes, block_votes, block_frames):
+    """
+    Arrange DB vote counts per block of query time.
+    Each window is a sum of consecutive blocks, so the lookups
+    and vote counting are shared by all windows overlapping a block.
+    block_votes = [(block, song_id, db_offset - query_offset, votes), ...]
+    Returns (votes per block, hash count per block).
+    """
+
+    n_blocks = int(max(t for _, t in hashes)) // block_frames + 1
+    votes = [Counter() for _ in range(n_blocks)]
+    counts = [0] * n_blocks
+
+    for _, query_offset in hashes:
+        counts[int(query_offset) // block_frames] += 1
+
+    for block, song_id, delta, block_count in block_votes:
+        votes[block][(song_id, delta)] += block_count
+
+    return votes, counts
+
+
+def _score_window(votes, total_hashes, min_votes, min_confidence):
+    """
+    Pick the song with the most time-aligned votes in a window.
+    Returns (song_id, confidence) or None.
+    """
+
+    if not votes or not total_hashes:
+        return None
+
+    (song_id, _), best = votes.most_common(1)[0]
+    confidence = best / total_hashes
+
+    if best < min_votes or confidence < min_confidence:
+        return None
+
+    return song_id, confidence
+
+
+def build_timeline(
+    hashes,
+    block_votes,
+    window=SEGMENT_WINDOW,
+    hop=SEGMENT_HOP,
+    min_votes=SEGMENT_MIN_VOTES,
+    min_confidence=SEGMENT_MIN_CONFIDENCE,
+):
+    """
+    Slide a window over the query hashes and score each window
+    from the per-block DB vote counts (see find_block_votes,
+    which must be called with hop_frames(hop)).
+    hashes = [(hash, time_offset), ...]
+    block_votes = [(block, song_id, db_offset - query_offset, votes), ...]
+    Consecutive windows agreeing on a song are merged.
+    Returns list of (start_sec, end_sec, song_id, confidence).
+    """
+
+    if not hashes:
+        return []
+
+    if window % hop:
+        raise ValueError("Segment window must be a multiple of the hop")
+
+    blocks_per_window = window // hop
+
+    votes, counts = _block_votes(hashes, block_votes, hop_frames(hop))
+    n_blocks = len(votes)
+
+    # Last block is usually partial, don't report past the end of the recording
+    duration = round(max(int(t) for _, t in hashes) / FRAMES_PER_SECOND, 2)
+
+    timeline = []
+
+    for start in range(0, max(1, n_blocks - blocks_per_window + 1)):
+        end = min(start + blocks_per_window, n_blocks)
+
+        window_votes = Counter()
+        for block in votes[start:end]:
+            window_votes.update(block)
+
+        match = _score_window(
+            window_votes,
+            sum(counts[start:end]),
+            min_votes,
+            min_confidence,
+        )
+        if match is None:
+            continue
+
+        song_id, confidence = match
+        start_sec = start * hop
+        end_sec = min(end * hop, duration)
+
+        if timeline and timeline[-1][2] == song_id and timeline[-1][1] >= start_sec:
+            prev_start, _, _, prev_confidence = timeline[-1]
+            timeline[-1] = (prev_start, end_sec, song_id, max(prev_confidence, confidence))
+            continue
+
+        if timeline and timeline[-1][1] > start_sec:
+            # Overlapping windows disagree, split the overlap at the new window start
+            prev_start, _, prev_song, prev_confidence = timeline[-1]
+            timeline[-1] = (prev_start, start_sec, prev_song, prev_confidence)
+
+        timeline.append((start_sec, end_sec, song_id, confidence))
+
+    return timeline
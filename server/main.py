@@ -1,10 +1,7 @@
 import sys
 import os
-import sounddevice as sd
-import soundfile as sf
-import numpy as np
 
-from server.engine.handler import insert_from_url, match_from_file
+from server.engine.handler import insert_from_url, match_from_file, match_segments_from_file
 
 
 MIC_DEVICE_INDEX = 2
@@ -18,6 +15,9 @@ def record_from_mic():
     """
     Record a 5 second snippet from the mic
     """
+    import numpy as np
+    import sounddevice as sd
+    import soundfile as sf
 
     print("Starting to record...")
     sd.default.device = (MIC_DEVICE_INDEX, None)
@@ -53,7 +53,9 @@ def main():
         print(f"Usage: python {sys.argv[0]} <flag> <optional>")
         print("- insert <url>: Takes in YT music URL and insert fingerprints to DB")
         print("- match <file_path>: Takes in file_path and find a match to that audio file")
+        print("- segments <file_path>: Takes in a long recording (mix) and find every song in it")
         print("- mic: Record 5s clip from microphone, and compare to DB")
+        print("- warmup: Prime the match pipeline and print a startup-time report")
         sys.exit(1)
 
     flag = sys.argv[1]
@@ -75,6 +77,19 @@ def main():
             file_path = sys.argv[2]
 
             match_from_file(file_path)
+
+        elif flag == "warmup":
+            from server.engine.warmup import warm_up
+
+            for step, value in warm_up().items():
+                print(f"{step}: {value}")
+
+        elif flag == "segments":
+            if len(sys.argv) < 3:
+                raise Exception("File name missing")
+            file_path = sys.argv[2]
+
+            match_segments_from_file(file_path)
         
         else:
             raise Exception("Invalid option flag")